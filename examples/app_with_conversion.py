@@ -149,8 +149,9 @@ def create_app():
         - **MP3**: Lossy compression, good quality, small file size
         - **M4A/AAC**: Lossy compression, good quality, small file size
         - **OGG**: Lossy compression, good quality, small file size
+        - **Opus/WebM**: Lossy compression built for speech, smallest file size
         
-        *Bitrate setting only affects lossy formats (MP3, M4A, OGG)*
+        *Bitrate setting only affects lossy formats (MP3, M4A, OGG, Opus, WebM)*
         """)
         
         submit_button.click(
@@ -0,0 +1,35 @@
+"""
+Tune onnxruntime session options without creating the session yourself.
+Use the "low-latency" preset for a single stream or "max-throughput" for many concurrent streams.
+
+pip install -U kokoro-onnx soundfile
+
+wget https://github.com/thewh1teagle/kokoro-onnx/releases/download/model-files-v1.0/kokoro-v1.0.onnx
+wget https://github.com/thewh1teagle/kokoro-onnx/releases/download/model-files-v1.0/voices-v1.0.bin
+python examples/with_session_config.py
+"""
+
+import soundfile as sf
+
+from kokoro_onnx import Kokoro
+from kokoro_onnx.config import SessionConfig
+
+# Use a preset
+kokoro = Kokoro("kokoro-v1.0.onnx", "voices-v1.0.bin", session_config="low-latency")
+
+# Or configure the session options yourself
+kokoro = Kokoro(
+    "kokoro-v1.0.onnx",
+    "voices-v1.0.bin",
+    session_config=SessionConfig(
+        graph_optimization_level="all",
+        intra_op_num_threads=4,
+        allow_spinning=False,
+    ),
+)
+
+samples, sample_rate = kokoro.create(
+    "Hello. This audio generated by kokoro!", voice="af_sarah", speed=1.0, lang="en-us"
+)
+sf.write("audio.wav", samples, sample_rate)
+print("Created audio.wav")
@@ -0,0 +1,44 @@
+"""
+Encode create_stream output on the fly with one long-lived ffmpeg process.
+Encoded bytes are available as soon as each chunk is synthesized, so they can be
+sent to a client (HTTP chunked response, websocket) before synthesis finishes.
+
+Note: ffmpeg must be installed and available in PATH
+
+pip install -U kokoro-onnx
+
+wget https://github.com/thewh1teagle/kokoro-onnx/releases/download/model-files-v1.0/kokoro-v1.0.onnx
+wget https://github.com/thewh1teagle/kokoro-onnx/releases/download/model-files-v1.0/voices-v1.0.bin
+python examples/with_stream_encode.py
+"""
+
+import asyncio
+
+from kokoro_onnx import Kokoro
+from kokoro_onnx.convert import encode_stream
+
+text = """
+We've just been hearing from Matthew Cappucci, a senior meteorologist at the weather app MyRadar, who says Kansas City is seeing its heaviest snow in 32 years.
+
+Despite it looking as though the storm is slowly moving eastwards, Cappucci says the situation in Kansas and Missouri remains serious.
+"""
+
+
+async def main():
+    kokoro = Kokoro("kokoro-v1.0.onnx", "voices-v1.0.bin")
+
+    stream = kokoro.create_stream(
+        text,
+        voice="af_nicole",
+        speed=1.0,
+        lang="en-us",
+    )
+
+    with open("audio.mp3", "wb") as f:
+        async for data in encode_stream(stream, "mp3", bitrate="128k"):
+            print(f"Received {len(data)} encoded bytes")
+            f.write(data)
+    print("Created audio.mp3")
+
+
+asyncio.run(main())
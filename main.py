@@ -323,15 +323,19 @@ def create_streaming_app():
                             ("🎧 MP3 - Lossy (Good Quality, Small)", "mp3"),
                             ("📱 M4A - Lossy (Good Quality, Mobile)", "m4a"),
                             ("🔊 OGG - Lossy (Good Quality, Open)", "ogg"),
+                            ("🗣️ Opus - Lossy (Speech, Smallest)", "opus"),
+                            ("🌐 WebM - Lossy (Opus, Browsers)", "webm"),
                         ],
                         scale=3,
                     )
 
                 with gr.Row():
                     bitrate_input = gr.Dropdown(
-                        label="Audio Quality (for MP3/M4A/OGG)",
+                        label="Audio Quality (for MP3/M4A/OGG/Opus)",
                         value="192k",
                         choices=[
+                            ("32 kbps - Speech quality (Opus)", "32k"),
+                            ("64 kbps - Good speech quality (Opus)", "64k"),
                             ("96 kbps - Lower quality, smaller file", "96k"),
                             ("128 kbps - Standard quality", "128k"),
                             ("192 kbps - High quality (recommended)", "192k"),
@@ -359,6 +363,8 @@ def create_streaming_app():
                         "mp3": "**MP3**: Lossy compression, small files, widely compatible. Best for: Sharing, streaming",
                         "m4a": "**M4A**: Lossy compression, small files, great for mobile devices. Best for: Mobile, iTunes",
                         "ogg": "**OGG**: Lossy compression, open standard, good quality. Best for: Web, open-source apps",
+                        "opus": "**Opus**: Lossy compression built for speech, smallest files. Best for: Voice streaming, bandwidth-limited clients",
+                        "webm": "**WebM**: Opus in a WebM container, plays natively in browsers. Best for: Web playback",
                     }
 
                     # Calculate estimated file size for 10 seconds of audio
@@ -386,7 +392,7 @@ def create_streaming_app():
 
                 # Update bitrate visibility based on format
                 def update_bitrate_visibility(format_choice):
-                    lossy_formats = ["mp3", "m4a", "ogg"]
+                    lossy_formats = ["mp3", "m4a", "ogg", "opus", "webm"]
                     return gr.update(visible=format_choice in lossy_formats)
 
                 format_input.change(
@@ -710,8 +716,9 @@ def create_streaming_app():
         - **MP3**: Lossy compression, good quality, small file size
         - **M4A/AAC**: Lossy compression, good quality, small file size
         - **OGG**: Lossy compression, good quality, small file size
+        - **Opus/WebM**: Lossy compression built for speech, smallest file size
         
-        *Bitrate setting only affects lossy formats (MP3, M4A, OGG)*
+        *Bitrate setting only affects lossy formats (MP3, M4A, OGG, Opus, WebM)*
         """)
 
         # Add example texts in multiple languages with human readable names
@@ -0,0 +1,81 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "kokoro-onnx",
+# ]
+#
+# [tool.uv.sources]
+# kokoro-onnx = { path = "../" }
+# ///
+"""
+Pre-render a list of phrases (e.g. IVR prompts) into a memory mappable phrase bank.
+
+The phrase list is a CSV file with a header, or a JSONL file with one object per line,
+with the fields: id, text, voice, speed (optional), lang (optional).
+A missing id defaults to the line number.
+
+Run this file via:
+uv run scripts/build_phrase_bank.py phrases.csv prompts.bin --model kokoro-v1.0.onnx --voices voices-v1.0.bin
+
+Then serve clips with:
+    from kokoro_onnx.phrases import PhraseBank
+    bank = PhraseBank("prompts.bin")
+    samples = bank["welcome"]
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from collections.abc import Iterator
+
+from kokoro_onnx import Kokoro
+from kokoro_onnx.phrases import Phrase, build_phrase_bank
+
+
+def read_phrases(path: str) -> Iterator[Phrase]:
+    with open(path, encoding="utf-8", newline="") as fp:
+        if path.endswith(".jsonl"):
+            rows = (json.loads(line) for line in fp if line.strip())
+        else:
+            rows = csv.DictReader(fp)
+        for i, row in enumerate(rows):
+            yield Phrase(
+                id=str(row.get("id") or i),
+                text=row["text"],
+                voice=row["voice"],
+                speed=float(row.get("speed") or 1.0),
+                lang=row.get("lang") or "en-us",
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser("Build a phrase bank from a phrase list")
+    parser.add_argument("phrases_path", help="path to phrases .csv or .jsonl file")
+    parser.add_argument("output_path", help="path to output phrase bank blob")
+    parser.add_argument("--model", default="kokoro-v1.0.onnx", help="path to model")
+    parser.add_argument("--voices", default="voices-v1.0.bin", help="path to voices")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of phrases synthesized concurrently (default: derived from CPU count)",
+    )
+    args = parser.parse_args()
+
+    kokoro = Kokoro(
+        args.model,
+        args.voices,
+        session_config="max-throughput",
+        max_workers=args.workers,
+    )
+    start_t = time.time()
+    count = build_phrase_bank(kokoro, read_phrases(args.phrases_path), args.output_path)
+    mb_size = os.path.getsize(args.output_path) // 1000 // 1000
+    print(
+        f"Created {args.output_path} ({mb_size}MB) with {count} phrases in {time.time() - start_t:.2f}s"
+    )
+
+
+main()
@@ -0,0 +1,39 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "kokoro-onnx",
+# ]
+#
+# [tool.uv.sources]
+# kokoro-onnx = { path = "../" }
+# ///
+"""
+Convert the voices npz archive into an uncompressed, memory mappable layout.
+
+Run this file via:
+uv run scripts/convert_voices.py voices-v1.0.bin voices-v1.0.npy
+
+Then load it with Kokoro("kokoro-v1.0.onnx", "voices-v1.0.npy")
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from kokoro_onnx.voices import save_mmap_voices
+
+
+def main():
+    parser = argparse.ArgumentParser("Convert voices to a memory mappable file")
+    parser.add_argument("voices_path", help="path to voices npz file (.bin)")
+    parser.add_argument("output_path", help="path to output .npy file")
+    args = parser.parse_args()
+
+    voices = np.load(args.voices_path)
+    save_mmap_voices(voices, args.output_path)
+    mb_size = os.path.getsize(args.output_path) // 1000 // 1000
+    print(f"Created {args.output_path} ({mb_size}MB) with {len(voices.files)} voices")
+
+
+main()
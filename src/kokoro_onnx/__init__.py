@@ -1,22 +1,42 @@
 import asyncio
+import hashlib
 import importlib
 import importlib.metadata
 import importlib.util
 import json
 import os
 import platform
-import re
+import queue
 import time
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
 
 import numpy as np
 import onnxruntime as rt
 from numpy.typing import NDArray
 
-from .config import MAX_PHONEME_LENGTH, SAMPLE_RATE, EspeakConfig, KoKoroConfig
+from .cache import AudioCache, PhonemeCache, content_hash, file_fingerprint
+from .config import (
+    MAX_BUFFERED_CHUNKS,
+    MAX_PHONEME_LENGTH,
+    PIPELINE_QUEUE_SIZE,
+    SAMPLE_RATE,
+    SAMPLES_PER_FRAME,
+    STAGE_WORKERS,
+    VOICE_CACHE_BYTES,
+    EspeakConfig,
+    KoKoroConfig,
+    SessionConfig,
+)
+from .join import join_chunks
 from .log import log
+from .session import create_session, resolve_session_config
+from .split import split_phonemes, split_text
 from .tokenizer import Tokenizer
-from .trim import trim as trim_audio
+from .trim import trim_mono as trim_audio
+from .voices import VoiceCache, load_voices
 
 
 class Kokoro:
@@ -26,7 +46,36 @@ class Kokoro:
         voices_path: str,
         espeak_config: EspeakConfig | None = None,
         vocab_config: dict | str | None = None,
+        session_config: SessionConfig | str | None = None,
+        max_workers: int | None = None,
+        intra_op_num_threads: int | None = None,
+        inter_op_num_threads: int | None = None,
+        executor: Executor | None = None,
+        voice_cache_bytes: int = VOICE_CACHE_BYTES,
+        phoneme_cache: PhonemeCache | None = None,
+        phonemize_workers: int = 0,
+        num_sessions: int = 1,
+        audio_cache: AudioCache | None = None,
     ):
+        """
+        session_config: onnxruntime session tuning, either a SessionConfig or
+            a preset name ("low-latency" or "max-throughput").
+        max_workers: number of inferences create_stream runs concurrently.
+        intra_op_num_threads / inter_op_num_threads: onnxruntime thread pools sizes.
+            When only one of max_workers and intra_op_num_threads is set, the other is
+            derived so that max_workers * intra_op_num_threads matches the CPU count.
+            These take precedence over the values in session_config.
+        executor: use an existing executor for inference instead of creating one.
+        voice_cache_bytes: memory budget of the decoded voice styles LRU cache.
+        phoneme_cache: reuse phonemes of previously seen sentences.
+        phonemize_workers: phonemize sentences in parallel in this many worker
+            processes, useful for book length input. 0 disables the pool.
+        num_sessions: spread the chunks of a create() call across this many
+            inference sessions running in parallel, each one with a share of the CPU
+            cores. Every session holds its own copy of the model weights.
+        audio_cache: return the audio of previously synthesized requests from
+            create() without running the model.
+        """
         # Show useful information for bug reports
         log.debug(
             f"koko-onnx version {importlib.metadata.version('kokoro-onnx')} on {platform.platform()} {platform.version()}"
@@ -48,11 +97,37 @@ class Kokoro:
             providers = [env_provider]
 
         log.debug(f"Providers: {providers}")
-        self.sess = rt.InferenceSession(model_path, providers=providers)
-        self.voices: np.ndarray = np.load(voices_path)
+        assert num_sessions >= 1, "Number of sessions should be at least 1"
+        if max_workers is None and num_sessions > 1:
+            # One worker per session, intra-op threads are derived from it
+            max_workers = num_sessions
+        session_config = resolve_session_config(
+            session_config,
+            max_workers=max_workers,
+            intra_op_num_threads=intra_op_num_threads,
+            inter_op_num_threads=inter_op_num_threads,
+        )
+        log.debug(f"Session config: {session_config}")
+        self.sess = create_session(model_path, providers, session_config)
+        self._session_pool: queue.Queue[rt.InferenceSession] | None = None
+        if num_sessions > 1:
+            self._session_pool = queue.Queue()
+            self._session_pool.put(self.sess)
+            for _ in range(num_sessions - 1):
+                self._session_pool.put(
+                    create_session(model_path, providers, session_config)
+                )
+        self._init_executor(session_config.max_workers, executor)
+        self.voices = VoiceCache(load_voices(voices_path), voice_cache_bytes)
 
         vocab = self._load_vocab(vocab_config)
-        self.tokenizer = Tokenizer(espeak_config, vocab=vocab)
+        self.tokenizer = Tokenizer(
+            espeak_config,
+            vocab=vocab,
+            phoneme_cache=phoneme_cache,
+            phonemize_workers=phonemize_workers,
+        )
+        self._init_audio_cache(audio_cache)
 
     @classmethod
     def from_session(
@@ -61,17 +136,79 @@ class Kokoro:
         voices_path: str,
         espeak_config: EspeakConfig | None = None,
         vocab_config: dict | str | None = None,
+        max_workers: int = 1,
+        executor: Executor | None = None,
+        voice_cache_bytes: int = VOICE_CACHE_BYTES,
+        phoneme_cache: PhonemeCache | None = None,
+        phonemize_workers: int = 0,
+        audio_cache: AudioCache | None = None,
     ):
         instance = cls.__new__(cls)
         instance.sess = session
+        instance._session_pool = None
+        instance._init_executor(max_workers, executor)
         instance.config = KoKoroConfig(session._model_path, voices_path, espeak_config)
         instance.config.validate()
-        instance.voices = np.load(voices_path)
+        instance.voices = VoiceCache(load_voices(voices_path), voice_cache_bytes)
 
         vocab = instance._load_vocab(vocab_config)
-        instance.tokenizer = Tokenizer(espeak_config, vocab=vocab)
+        instance.tokenizer = Tokenizer(
+            espeak_config,
+            vocab=vocab,
+            phoneme_cache=phoneme_cache,
+            phonemize_workers=phonemize_workers,
+        )
+        instance._init_audio_cache(audio_cache)
         return instance
 
+    def _init_executor(self, max_workers: int, executor: Executor | None):
+        self.max_workers = max_workers
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="kokoro-inference"
+        )
+        # Phonemize and trim stages of create_stream, kept off asyncio's default executor
+        self._stage_executor = ThreadPoolExecutor(
+            max_workers=STAGE_WORKERS, thread_name_prefix="kokoro-stage"
+        )
+
+    def _init_audio_cache(self, audio_cache: AudioCache | None):
+        self.audio_cache = audio_cache
+        self._model_hash = None
+        if audio_cache is not None:
+            self._model_hash = content_hash(
+                [
+                    *file_fingerprint(self.config.model_path),
+                    *file_fingerprint(self.config.voices_path),
+                    self.tokenizer.vocab_hash,
+                ]
+            )[:16]
+
+    @contextmanager
+    def _acquire_session(self) -> Iterator[rt.InferenceSession]:
+        """
+        Take a free session from the pool, or the only session without one
+        (onnxruntime allows concurrent runs on the same session)
+        """
+        if self._session_pool is None:
+            yield self.sess
+            return
+        sess = self._session_pool.get()
+        try:
+            yield sess
+        finally:
+            self._session_pool.put(sess)
+
+    def close(self):
+        """
+        Shut down the inference executor if it was created by Kokoro,
+        the create_stream stage threads and the phonemization worker processes.
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self._stage_executor.shutdown(wait=False, cancel_futures=True)
+        self.tokenizer.close()
+
     def _load_vocab(self, vocab_config: dict | str | None) -> dict:
         """Load vocabulary from config file or dictionary.
 
@@ -90,38 +227,82 @@ class Kokoro:
             return vocab_config["vocab"]
         return {}
 
+    def _duration_output(self) -> int | None:
+        """Position of the model's duration output, None for models without one."""
+        names = [o.name for o in self.sess.get_outputs()]
+        return names.index("duration") if "duration" in names else None
+
+    def _has_duration(self) -> bool:
+        return self._duration_output() is not None
+
+    def _resolve_trim(self, trim: bool | str) -> bool | str:
+        """The trim mode to run, with True spelled as "energy"."""
+        assert trim in (True, False, "energy", "duration"), (
+            "Trim should be True, False, 'energy' or 'duration'"
+        )
+        if trim is True:
+            return "energy"
+        if trim == "duration" and not self._has_duration():
+            log.warning(
+                "Model has no duration output, falling back to energy based trimming"
+            )
+            return "energy"
+        return trim
+
+    @staticmethod
+    def _pad_bounds(duration: NDArray[np.int64], num_tokens: int) -> tuple[int, int]:
+        """
+        Sample range of the real tokens in a waveform, leaving out the frames
+        predicted for the pad tokens at the start & end.
+        """
+        start = int(duration[0]) * SAMPLES_PER_FRAME
+        end = int(duration[: num_tokens + 1].sum()) * SAMPLES_PER_FRAME
+        return start, end
+
     def _create_audio(
-        self, phonemes: str, voice: NDArray[np.float32], speed: float
+        self,
+        phonemes: str,
+        voice: NDArray[np.float32],
+        speed: float,
+        run_options: rt.RunOptions | None = None,
+        trim_pads: bool = False,
     ) -> tuple[NDArray[np.float32], int]:
+        """
+        trim_pads: cut the frames of the pad tokens at the start & end, using the
+            model's duration output.
+        """
         log.debug(f"Phonemes: {phonemes}")
-        if len(phonemes) > MAX_PHONEME_LENGTH:
-            log.warning(
-                f"Phonemes are too long, truncating to {MAX_PHONEME_LENGTH} phonemes"
-            )
-        phonemes = phonemes[:MAX_PHONEME_LENGTH]
         start_t = time.time()
-        tokens = np.array(self.tokenizer.tokenize(phonemes), dtype=np.int64)
+        tokens = self.tokenizer.tokenize(phonemes)
         assert len(tokens) <= MAX_PHONEME_LENGTH, (
             f"Context length is {MAX_PHONEME_LENGTH}, but leave room for the pad token 0 at the start & end"
         )
 
         voice = voice[len(tokens)]
-        tokens = [[0, *tokens, 0]]
+        # Pad token 0 at the start & end
+        input_ids = np.zeros((1, len(tokens) + 2), dtype=np.int64)
+        input_ids[0, 1:-1] = tokens
         if "input_ids" in [i.name for i in self.sess.get_inputs()]:
             # Newer export versions
             inputs = {
-                "input_ids": tokens,
+                "input_ids": input_ids,
                 "style": np.array(voice, dtype=np.float32),
                 "speed": np.array([speed], dtype=np.int32),
             }
         else:
             inputs = {
-                "tokens": tokens,
+                "tokens": input_ids,
                 "style": voice,
                 "speed": np.ones(1, dtype=np.float32) * speed,
             }
 
-        audio = self.sess.run(None, inputs)[0]
+        with self._acquire_session() as sess:
+            outputs = sess.run(None, inputs, run_options)
+        audio = outputs[0]
+        if trim_pads:
+            duration = outputs[self._duration_output()].reshape(-1)
+            start, end = self._pad_bounds(duration, len(tokens))
+            audio = audio[start:end]
         audio_duration = len(audio) / SAMPLE_RATE
         create_duration = time.time() - start_t
         rtf = create_duration / audio_duration
@@ -133,39 +314,57 @@ class Kokoro:
     def get_voice_style(self, name: str) -> NDArray[np.float32]:
         return self.voices[name]
 
+    def preload(self, voices: list[str]):
+        """Decode voices into the voice cache ahead of the first request."""
+        for name in voices:
+            assert name in self.voices, f"Voice {name} not found in available voices"
+        self.voices.preload(voices)
+
     def _split_phonemes(self, phonemes: str) -> list[str]:
         """
-        Split phonemes into batches of MAX_PHONEME_LENGTH
-        Prefer splitting at punctuation marks.
+        Split phonemes into balanced chunks that fit the model context
         """
-        # Regular expression to split by punctuation and keep them
-        words = re.split(r"([.,!?;])", phonemes)
-        batched_phoenemes: list[str] = []
-        current_batch = ""
-
-        for part in words:
-            # Remove leading/trailing whitespace
-            part = part.strip()
-
-            if part:
-                # If adding the part exceeds the max length, split into a new batch
-                # TODO: make it more accurate
-                if len(current_batch) + len(part) + 1 >= MAX_PHONEME_LENGTH:
-                    batched_phoenemes.append(current_batch.strip())
-                    current_batch = part
-                else:
-                    if part in ".,!?;":
-                        current_batch += part
-                    else:
-                        if current_batch:
-                            current_batch += " "
-                        current_batch += part
-
-        # Append the last batch if it contains any phonemes
-        if current_batch:
-            batched_phoenemes.append(current_batch.strip())
+        # Filter first, so that a chunk's length in characters is its token count
+        # and tokenize() accepts it, even when the input has characters outside the vocab
+        phonemes = self.tokenizer.filter_phonemes(phonemes)
+        # voice styles are indexed by token count, the last index is MAX_PHONEME_LENGTH - 1
+        return split_phonemes(
+            phonemes, self.tokenizer.count_tokens, MAX_PHONEME_LENGTH - 1
+        )
 
-        return batched_phoenemes
+    def audio_cache_key(
+        self,
+        text: str,
+        voice: str | NDArray[np.float32],
+        speed: float = 1.0,
+        lang: str = "en-us",
+        is_phonemes: bool = False,
+        trim: bool | str = True,
+        crossfade: float = 0.0,
+        silence: float = 0.0,
+    ) -> str:
+        """
+        Content hash of a create() request, used as the audio cache key.
+        Callers can use it to cache encoded output of the same request.
+        """
+        if not isinstance(voice, str):
+            # Blended or custom styles are identified by their values
+            voice = hashlib.sha256(np.ascontiguousarray(voice).tobytes()).hexdigest()
+        # True and "energy" are the same mode, they share an entry
+        trim = self._resolve_trim(trim)
+        return content_hash(
+            [
+                text,
+                is_phonemes,
+                voice,
+                speed,
+                lang,
+                trim,
+                crossfade,
+                silence,
+                self._model_hash,
+            ]
+        )
 
     def create(
         self,
@@ -174,12 +373,32 @@ class Kokoro:
         speed: float = 1.0,
         lang: str = "en-us",
         is_phonemes: bool = False,
-        trim: bool = True,
+        trim: bool | str = True,
+        crossfade: float = 0.0,
+        silence: float = 0.0,
     ) -> tuple[NDArray[np.float32], int]:
         """
         Create audio from text using the specified voice and speed.
+
+        trim: how leading and trailing silence is cut from each chunk.
+            True or "energy" detects silence in the signal, "duration" cuts the
+            frames the model predicts for the pad tokens (requires a model with a
+            duration output) and False keeps the chunks untouched.
+        crossfade: seconds each chunk overlaps the previous one, for smoother joins.
+        silence: seconds of silence inserted between chunks instead.
         """
         assert speed >= 0.5 and speed <= 2.0, "Speed should be between 0.5 and 2.0"
+        trim = self._resolve_trim(trim)
+
+        cache_key = None
+        if self.audio_cache is not None:
+            cache_key = self.audio_cache_key(
+                text, voice, speed, lang, is_phonemes, trim, crossfade, silence
+            )
+            cached = self.audio_cache.get(cache_key)
+            if cached is not None:
+                log.debug("Returning audio from the audio cache")
+                return cached.copy(), SAMPLE_RATE
 
         if isinstance(voice, str):
             assert voice in self.voices, f"Voice {voice} not found in available voices"
@@ -189,7 +408,9 @@ class Kokoro:
         if is_phonemes:
             phonemes = text
         else:
-            phonemes = self.tokenizer.phonemize(text, lang)
+            # Phonemize sentence by sentence, in parallel with phonemize_workers
+            sentences = list(split_text(text, lang))
+            phonemes = " ".join(self.tokenizer.phonemize_batch(sentences, lang))
         # Create batches of phonemes by splitting spaces to MAX_PHONEME_LENGTH
         batched_phoenemes = self._split_phonemes(phonemes)
 
@@ -197,15 +418,35 @@ class Kokoro:
         log.debug(
             f"Creating audio for {len(batched_phoenemes)} batches for {len(phonemes)} phonemes"
         )
-        for phonemes in batched_phoenemes:
-            audio_part, _ = self._create_audio(phonemes, voice, speed)
-            if trim:
+        trim_pads = trim == "duration"
+        if self._session_pool is not None and len(batched_phoenemes) > 1:
+            # Run on the session pool in parallel, map() keeps the order
+            results = self.executor.map(
+                self._create_audio,
+                batched_phoenemes,
+                repeat(voice),
+                repeat(speed),
+                repeat(None),
+                repeat(trim_pads),
+            )
+        else:
+            results = (
+                self._create_audio(phonemes, voice, speed, trim_pads=trim_pads)
+                for phonemes in batched_phoenemes
+            )
+        for audio_part, _ in results:
+            if trim and not trim_pads:
                 # Trim leading and trailing silence for a more natural sound concatenation
                 # (initial ~2s, subsequent ~0.02s)
                 audio_part, _ = trim_audio(audio_part)
             audio.append(audio_part)
-        audio = np.concatenate(audio)
+        # One preallocated buffer instead of concatenating, with the joins applied
+        audio = join_chunks(
+            audio, int(crossfade * SAMPLE_RATE), int(silence * SAMPLE_RATE)
+        )
         log.debug(f"Created audio in {time.time() - start_t:.2f}s")
+        if cache_key is not None:
+            self.audio_cache.set(cache_key, audio)
         return audio, SAMPLE_RATE
 
     async def create_stream(
@@ -215,49 +456,147 @@ class Kokoro:
         speed: float = 1.0,
         lang: str = "en-us",
         is_phonemes: bool = False,
-        trim: bool = True,
+        trim: bool | str = True,
+        max_buffered_chunks: int = MAX_BUFFERED_CHUNKS,
     ) -> AsyncGenerator[tuple[NDArray[np.float32], int], None]:
         """
         Stream audio creation asynchronously in the background, yielding chunks as they are processed.
+
+        Phonemization, inference and trimming run as concurrent stages connected by
+        bounded queues, so the first chunk is ready after phonemizing only the first sentence.
+
+        trim: same as in create().
+        max_buffered_chunks: number of finished chunks kept ahead of the consumer
+            before the background work pauses. 0 means unbounded.
+
+        Closing the generator (e.g. with contextlib.aclosing) or cancelling the task
+        consuming it stops the background work, including the running inference.
         """
         assert speed >= 0.5 and speed <= 2.0, "Speed should be between 0.5 and 2.0"
+        trim = self._resolve_trim(trim)
 
         if isinstance(voice, str):
             assert voice in self.voices, f"Voice {voice} not found in available voices"
             voice = self.get_voice_style(voice)
 
-        if is_phonemes:
-            phonemes = text
-        else:
-            phonemes = self.tokenizer.phonemize(text, lang)
-
-        batched_phonemes = self._split_phonemes(phonemes)
-        queue: asyncio.Queue[tuple[NDArray[np.float32], int] | None] = asyncio.Queue()
-
-        async def process_batches():
-            """Process phoneme batches in the background."""
-            for i, phonemes in enumerate(batched_phonemes):
-                loop = asyncio.get_event_loop()
-                # Execute in separate thread since it's blocking operation
-                audio_part, sample_rate = await loop.run_in_executor(
-                    None, self._create_audio, phonemes, voice, speed
+        # Phonemes are passed through as is, text is phonemized one sentence at a time
+        sentences = [text] if is_phonemes else list(split_text(text, lang))
+        phonemes_queue: asyncio.Queue[str | None] = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+        audio_queue: asyncio.Queue[NDArray[np.float32] | None] = asyncio.Queue(
+            PIPELINE_QUEUE_SIZE
+        )
+        queue: asyncio.Queue[tuple[NDArray[np.float32], int] | Exception | None] = (
+            asyncio.Queue(max_buffered_chunks)
+        )
+        # Lets us abort an inference already running in the executor
+        run_options = rt.RunOptions()
+        loop = asyncio.get_running_loop()
+
+        async def phonemize_stage():
+            """
+            Phonemize sentences and split them into chunks. The first sentence is sent
+            on its own for a short time to first audio, the following ones are packed
+            together up to the model context so they don't each cost an inference.
+            """
+
+            async def put_chunks(phonemes: str):
+                for batch in self._split_phonemes(phonemes):
+                    await phonemes_queue.put(batch)
+
+            futures = []
+            if not is_phonemes and self.tokenizer.phonemize_workers > 0:
+                # Phonemize all sentences ahead in the worker processes
+                futures = [self.tokenizer.submit(s, lang) for s in sentences]
+            try:
+                pending = ""
+                for i, sentence in enumerate(sentences):
+                    if is_phonemes:
+                        phonemes = sentence
+                    elif futures:
+                        phonemes = await asyncio.wrap_future(futures[i])
+                    else:
+                        phonemes = await loop.run_in_executor(
+                            self._stage_executor,
+                            self.tokenizer.phonemize,
+                            sentence,
+                            lang,
+                        )
+                    if i == 0:
+                        await put_chunks(phonemes)
+                    elif pending and (
+                        self.tokenizer.count_tokens(f"{pending} {phonemes}")
+                        < MAX_PHONEME_LENGTH
+                    ):
+                        pending = f"{pending} {phonemes}"
+                    else:
+                        await put_chunks(pending)
+                        pending = phonemes
+                await put_chunks(pending)
+                await phonemes_queue.put(None)
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        async def inference_stage():
+            """Create audio for each chunk."""
+            while (phonemes := await phonemes_queue.get()) is not None:
+                # Execute in the inference executor since it's blocking operation
+                audio_part, _ = await loop.run_in_executor(
+                    self.executor,
+                    self._create_audio,
+                    phonemes,
+                    voice,
+                    speed,
+                    run_options,
+                    trim == "duration",
                 )
-                if trim:
+                await audio_queue.put(audio_part)
+            await audio_queue.put(None)
+
+        async def trim_stage():
+            """Post process audio chunks and hand them to the consumer."""
+            i = 0
+            while (audio_part := await audio_queue.get()) is not None:
+                if trim and trim != "duration":
                     # Trim leading and trailing silence for a more natural sound concatenation
                     # (initial ~2s, subsequent ~0.02s)
-                    audio_part, _ = trim_audio(audio_part)
+                    audio_part, _ = await loop.run_in_executor(
+                        self._stage_executor, trim_audio, audio_part
+                    )
                 log.debug(f"Processed chunk {i} of stream")
-                await queue.put((audio_part, sample_rate))
+                await queue.put((audio_part, SAMPLE_RATE))
+                i += 1
             await queue.put(None)  # Signal the end of the stream
 
-        # Start processing in the background
-        asyncio.create_task(process_batches())
+        async def run_pipeline():
+            """Run all stages concurrently, stopping them all if one fails."""
+            stages = [
+                asyncio.create_task(stage())
+                for stage in (phonemize_stage, inference_stage, trim_stage)
+            ]
+            try:
+                await asyncio.gather(*stages)
+            except Exception as e:
+                for stage in stages:
+                    stage.cancel()
+                await queue.put(e)
 
-        while True:
-            chunk = await queue.get()
-            if chunk is None:
-                break
-            yield chunk
+        # Start processing in the background
+        pipeline = asyncio.create_task(run_pipeline())
+
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            if not pipeline.done():
+                log.debug("Stream closed early, cancelling pending work")
+                run_options.terminate = True
+                pipeline.cancel()
 
     def get_voices(self) -> list[str]:
         return list(sorted(self.voices.keys()))
@@ -0,0 +1,204 @@
+"""
+Caches for repeated work across requests
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import AUDIO_CACHE_BYTES
+
+
+def file_fingerprint(path: str | Path) -> list[int]:
+    """Cheap identity of a file, its size and modification time, without reading it"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def content_hash(parts: list) -> str:
+    """Hex sha256 of JSON serializable parts, for cache keys"""
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+class BytesLRU:
+    """
+    Least recently used entries within a budget of max_bytes, where arrays count
+    their nbytes and bytes their length. Entries larger than the whole budget are
+    not kept. Not thread safe, callers guard it with their own lock.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: OrderedDict[Hashable, np.ndarray | bytes] = OrderedDict()
+
+    @staticmethod
+    def _size(value: np.ndarray | bytes) -> int:
+        return value.nbytes if isinstance(value, np.ndarray) else len(value)
+
+    def get(self, key: Hashable) -> np.ndarray | bytes | None:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: np.ndarray | bytes):
+        size = self._size(value)
+        if key in self._entries or size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= self._size(evicted)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PhonemeCache:
+    """
+    Sentence level cache of phonemizer output, keyed by (text, lang, vocab hash).
+    Keeps the most recently used entries in memory, and optionally persists every
+    entry in a sqlite database so warm workers skip espeak for known sentences.
+    """
+
+    def __init__(self, max_entries: int = 10_000, db_path: str | None = None):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[tuple[str, str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS phonemes ("
+                "text TEXT, lang TEXT, vocab TEXT, phonemes TEXT, "
+                "PRIMARY KEY (text, lang, vocab))"
+            )
+            self._db.commit()
+
+    def get(self, text: str, lang: str, vocab_hash: str) -> str | None:
+        key = (text, lang, vocab_hash)
+        with self._lock:
+            phonemes = self._cache.get(key)
+            if phonemes is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return phonemes
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT phonemes FROM phonemes WHERE text = ? AND lang = ? AND vocab = ?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    self._put(key, row[0])
+                    self.hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def set(self, text: str, lang: str, vocab_hash: str, phonemes: str):
+        key = (text, lang, vocab_hash)
+        with self._lock:
+            self._put(key, phonemes)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO phonemes VALUES (?, ?, ?, ?)",
+                    (*key, phonemes),
+                )
+                self._db.commit()
+
+    def _put(self, key: tuple[str, str, str], phonemes: str):
+        self._cache[key] = phonemes
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class AudioCache:
+    """
+    Whole-utterance cache of synthesized audio, keyed by a content hash of everything
+    that affects the output (see Kokoro.audio_cache_key).
+    Entries are either raw float32 samples (fmt "raw") or encoded bytes of an output
+    format, so servers can also skip the encoder for repeated prompts.
+    The most recently used entries are kept in memory within max_bytes, and every
+    entry is optionally written to cache_dir, one file per entry.
+    """
+
+    def __init__(
+        self, max_bytes: int = AUDIO_CACHE_BYTES, cache_dir: str | None = None
+    ):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._cache = BytesLRU(max_bytes)
+        self._lock = threading.Lock()
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str, fmt: str) -> Path:
+        # Raw samples are saved as .npy, encoded audio under its format suffix
+        return self.cache_dir / (f"{key}.npy" if fmt == "raw" else f"{key}.{fmt}")
+
+    def get(self, key: str, fmt: str = "raw") -> NDArray[np.float32] | bytes | None:
+        """Cached audio of key in fmt, raw samples are read-only."""
+        name = f"{key}.{fmt}"
+        with self._lock:
+            data = self._cache.get(name)
+            if data is not None:
+                self.hits += 1
+                return data
+        if self.cache_dir is not None:
+            path = self._path(key, fmt)
+            if path.exists():
+                data = np.load(path) if fmt == "raw" else path.read_bytes()
+                if fmt == "raw":
+                    data.flags.writeable = False
+                with self._lock:
+                    self._cache.put(name, data)
+                    self.hits += 1
+                return data
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, data: NDArray[np.float32] | bytes, fmt: str = "raw"):
+        name = f"{key}.{fmt}"
+        if fmt == "raw":
+            # Keep a read-only copy, so callers modifying their audio can't change the entry
+            data = np.array(data, dtype=np.float32)
+            data.flags.writeable = False
+        with self._lock:
+            self._cache.put(name, data)
+        if self.cache_dir is not None:
+            path = self._path(key, fmt)
+            # Write to a temporary file first so readers never see a partial entry
+            tmp_path = path.with_name(
+                f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            with open(tmp_path, "wb") as fp:
+                if fmt == "raw":
+                    np.save(fp, data)
+                else:
+                    fp.write(data)
+            os.replace(tmp_path, path)
+
+    @property
+    def nbytes(self) -> int:
+        return self._cache.nbytes
@@ -4,6 +4,19 @@ from pathlib import Path
 
 MAX_PHONEME_LENGTH = 510
 SAMPLE_RATE = 24000
+# Number of waveform samples produced for each frame of the model's `duration` output
+SAMPLES_PER_FRAME = 600
+# Number of items buffered between the phonemize, inference and trim stages of create_stream
+PIPELINE_QUEUE_SIZE = 2
+# Default number of finished chunks create_stream buffers ahead of its consumer
+MAX_BUFFERED_CHUNKS = 4
+# Threads running the phonemize and trim stages of create_stream, shared by all streams.
+# Both are short next to inference, and espeak runs one sentence at a time per language.
+STAGE_WORKERS = 2
+# Memory budget of decoded voice styles kept by Kokoro (each voice is ~0.5MB)
+VOICE_CACHE_BYTES = 64 * 1024 * 1024
+# Memory budget of the whole-utterance audio cache
+AUDIO_CACHE_BYTES = 256 * 1024 * 1024
 
 
 @dataclass
@@ -12,6 +25,31 @@ class EspeakConfig:
     data_path: str | None = None
 
 
+@dataclass
+class SessionConfig:
+    """
+    onnxruntime session tuning, None keeps the onnxruntime default.
+    See https://onnxruntime.ai/docs/performance/tune-performance/threading.html
+    """
+
+    # "disable", "basic", "extended" or "all"
+    graph_optimization_level: str | None = None
+    intra_op_num_threads: int | None = None
+    inter_op_num_threads: int | None = None
+    # "sequential" or "parallel"
+    execution_mode: str | None = None
+    enable_cpu_mem_arena: bool | None = None
+    enable_mem_pattern: bool | None = None
+    # Keep idle onnxruntime threads spinning, trading CPU for lower wake-up latency
+    allow_spinning: bool | None = None
+    # Number of inferences create_stream runs concurrently
+    max_workers: int | None = None
+    # Save the optimized graph next to the model on first load and load it directly afterwards
+    cache_optimized_model: bool = False
+    # Format of the cached optimized graph, "onnx" or "ort"
+    optimized_model_format: str = "onnx"
+
+
 class KoKoroConfig:
     def __init__(
         self,
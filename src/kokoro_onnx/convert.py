@@ -1,12 +1,114 @@
 """Audio format conversion utilities using ffmpeg."""
 
-import tempfile
-import os
+import asyncio
+import io
+import queue
+import threading
+from collections.abc import AsyncGenerator, AsyncIterable
 from pathlib import Path
-from typing import Tuple
+
+import ffmpeg
 import numpy as np
 import soundfile as sf
-import ffmpeg
+
+# ffmpeg muxer and options per output format.
+# Output goes to a pipe, so containers that normally seek back to write
+# their header (mp4) are written fragmented instead.
+FFMPEG_OUTPUT_OPTIONS = {
+    "wav": {"format": "wav"},
+    "mp3": {"format": "mp3"},
+    "m4a": {"format": "mp4", "movflags": "frag_keyframe+empty_moov"},
+    "flac": {"format": "flac"},
+    "ogg": {"format": "ogg"},
+    # Opus is tuned for speech and sent in 20 ms frames for low latency,
+    # Ogg pages are flushed every 100 ms instead of every second
+    "opus": {
+        "format": "opus", "acodec": "libopus", "application": "voip", "frame_duration": 20,
+        "page_duration": 100000
+    },
+    "webm": {
+        "format": "webm", "acodec": "libopus", "application": "voip", "frame_duration": 20
+    },
+}
+
+# Formats taking a bitrate
+LOSSY_FORMATS = {"mp3", "m4a", "ogg", "opus", "webm"}
+
+# Input rates the Opus encoder accepts, anything else is resampled
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+# Formats encoded in-process by soundfile, without spawning ffmpeg.
+# "pcm" is headerless 16-bit little-endian samples.
+NATIVE_FORMATS = {"wav", "flac", "pcm"}
+
+
+def float_to_int16(samples: np.ndarray, dither: bool = True) -> np.ndarray:
+    """
+    Convert float samples in [-1, 1] to int16 in a single vectorized pass.
+
+    With dither, triangular (TPDF) noise of one LSB is added before rounding, which
+    turns the quantization error of quiet passages into a constant noise floor
+    instead of distortion that follows the signal.
+    """
+    scaled = np.asarray(samples, dtype=np.float32) * np.float32(32767.0)
+    if dither:
+        rng = np.random.default_rng()
+        noise = rng.random(scaled.shape, dtype=np.float32)
+        noise -= rng.random(scaled.shape, dtype=np.float32)
+        scaled += noise
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return scaled.astype(np.int16)
+
+
+def encode_native(
+    samples: np.ndarray,
+    sample_rate: int,
+    output_format: str = "wav",
+    subtype: str = "PCM_16",
+    dither: bool = True
+) -> bytes:
+    """
+    Encode audio in-process into an in-memory buffer.
+
+    Args:
+        samples: Audio samples as numpy array
+        sample_rate: Sample rate of the audio
+        output_format: Target format (wav, flac, pcm)
+        subtype: "PCM_16" or "FLOAT" (wav only) sample encoding
+        dither: Dither when reducing float samples to 16 bit
+
+    Returns:
+        bytes: Encoded audio data
+    """
+    output_format = output_format.lower()
+    if output_format not in NATIVE_FORMATS:
+        raise ValueError(f"Unsupported native format: {output_format}")
+    if subtype == "FLOAT" and output_format != "wav":
+        raise ValueError(f"Float samples are only supported for wav, not {output_format}")
+
+    if subtype == "FLOAT":
+        data = np.asarray(samples, dtype=np.float32)
+    else:
+        data = float_to_int16(samples, dither)
+    if output_format == "pcm":
+        return data.astype("<i2", copy=False).tobytes()
+
+    buffer = io.BytesIO()
+    sf.write(buffer, data, sample_rate, format=output_format.upper(), subtype=subtype)
+    return buffer.getvalue()
+
+
+def _output_options(output_format: str, sample_rate: int, bitrate: str) -> dict:
+    """ffmpeg output options for a format, including bitrate and resampling."""
+    output_options = dict(FFMPEG_OUTPUT_OPTIONS[output_format])
+    if output_format in LOSSY_FORMATS:
+        output_options["audio_bitrate"] = bitrate
+    if output_format in ["opus", "webm"] and sample_rate not in OPUS_SAMPLE_RATES:
+        # 24 kHz model output is Opus-native, other rates go up to 48 kHz
+        output_options["ar"] = 48000
+    return output_options
 
 
 def convert_audio(
@@ -17,54 +119,154 @@ def convert_audio(
 ) -> bytes:
     """
     Convert audio samples to specified format using ffmpeg.
+
+    Raw float32 PCM is streamed into ffmpeg's stdin and the encoded audio is
+    read back from its stdout, without any temporary files. WAV, FLAC and raw
+    PCM are encoded in-process instead (see encode_native).
     
     Args:
         samples: Audio samples as numpy array
         sample_rate: Sample rate of the audio
-        output_format: Target format (mp3, m4a, flac, ogg, wav)
+        output_format: Target format (mp3, m4a, flac, ogg, opus, webm, wav, pcm)
         bitrate: Bitrate for lossy formats (e.g., "128k", "192k", "320k")
         
     Returns:
         bytes: Converted audio data
     """
-    # Create temporary files
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
-        with tempfile.NamedTemporaryFile(suffix=f".{output_format}", delete=False) as temp_output:
+    output_format = output_format.lower()
+    if output_format in NATIVE_FORMATS:
+        # Lossless formats don't need a subprocess
+        return encode_native(samples, sample_rate, output_format)
+
+    output_options = _output_options(output_format, sample_rate, bitrate)
+    channels = samples.shape[1] if samples.ndim == 2 else 1
+    pcm = np.ascontiguousarray(samples, dtype=np.float32).tobytes()
+    out, _ = (
+        ffmpeg
+        .input("pipe:", format="f32le", ac=channels, ar=sample_rate)
+        .output("pipe:", **output_options)
+        .run(input=pcm, capture_stdout=True, capture_stderr=True)
+    )
+    return out
+
+
+class StreamingEncoder:
+    """
+    Incremental encoder holding one long-lived ffmpeg process.
+
+    PCM chunks (e.g. from Kokoro.create_stream) are written to ffmpeg's stdin as
+    they arrive, and the encoded bytes ffmpeg produced so far are returned right
+    away, so clients can start receiving audio within the first chunk's latency.
+
+    Usage:
+        with StreamingEncoder(sample_rate, "mp3") as encoder:
+            for samples in chunks:
+                send(encoder.write(samples))
+            send(encoder.close())
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        output_format: str = "mp3",
+        bitrate: str = "128k",
+        channels: int = 1
+    ):
+        output_format = output_format.lower()
+        output_options = _output_options(output_format, sample_rate, bitrate)
+        self.process = (
+            ffmpeg
+            # Skip probing the raw input, which would otherwise hold back
+            # the first few seconds of audio
+            .input(
+                "pipe:", format="f32le", ac=channels, ar=sample_rate,
+                probesize=32, fflags="nobuffer"
+            )
+            # Hand out every packet as soon as it is muxed
+            .output("pipe:", flush_packets=1, **output_options)
+            .global_args("-loglevel", "error")
+            .run_async(pipe_stdin=True, pipe_stdout=True)
+        )
+        self._output: queue.Queue[bytes | None] = queue.Queue()
+        # Drain stdout in the background so ffmpeg never blocks on a full pipe
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        while data := self.process.stdout.read1(65536):
+            self._output.put(data)
+        self._output.put(None)
+
+    def _drain(self, block: bool = False) -> bytes:
+        """Collect the encoded bytes available so far, or all of them when block is set."""
+        parts = []
+        while True:
             try:
-                # Write samples to temporary WAV file
-                sf.write(temp_wav.name, samples, sample_rate)
-                
-                # Convert using ffmpeg
-                if output_format.lower() in ["mp3", "m4a", "ogg"]:
-                    # Lossy formats with bitrate
-                    (
-                        ffmpeg
-                        .input(temp_wav.name)
-                        .output(temp_output.name, audio_bitrate=bitrate)
-                        .overwrite_output()
-                        .run(quiet=True)
-                    )
-                else:
-                    # Lossless formats (flac, wav)
-                    (
-                        ffmpeg
-                        .input(temp_wav.name)
-                        .output(temp_output.name)
-                        .overwrite_output()
-                        .run(quiet=True)
-                    )
-                
-                # Read converted file
-                with open(temp_output.name, "rb") as f:
-                    return f.read()
-                    
-            finally:
-                # Clean up temporary files
-                try:
-                    os.unlink(temp_wav.name)
-                    os.unlink(temp_output.name)
-                except OSError:
-                    pass
+                data = self._output.get(block=block)
+            except queue.Empty:
+                break
+            if data is None:
+                break
+            parts.append(data)
+        return b"".join(parts)
+
+    def write(self, samples: np.ndarray) -> bytes:
+        """Feed PCM samples, returning the encoded bytes produced so far."""
+        self.process.stdin.write(
+            np.ascontiguousarray(samples, dtype=np.float32).tobytes()
+        )
+        self.process.stdin.flush()
+        return self._drain()
+
+    def close(self) -> bytes:
+        """Finish the stream, returning the remaining encoded bytes."""
+        if self.process.stdin.closed:
+            return b""
+        self.process.stdin.close()
+        data = self._drain(block=True)
+        self._reader.join()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with code {self.process.returncode}")
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.process.kill()
+            self.process.wait()
+
+
+async def encode_stream(
+    stream: AsyncIterable[tuple[np.ndarray, int]],
+    output_format: str = "mp3",
+    bitrate: str = "128k"
+) -> AsyncGenerator[bytes, None]:
+    """
+    Encode the (samples, sample_rate) chunks of Kokoro.create_stream on the fly,
+    yielding encoded bytes as soon as ffmpeg produces them.
+    """
+    loop = asyncio.get_running_loop()
+    encoder = None
+    try:
+        async for samples, sample_rate in stream:
+            if encoder is None:
+                encoder = StreamingEncoder(sample_rate, output_format, bitrate)
+            # Writing may block until ffmpeg consumes its input
+            data = await loop.run_in_executor(None, encoder.write, samples)
+            if data:
+                yield data
+        if encoder is not None:
+            data = await loop.run_in_executor(None, encoder.close)
+            if data:
+                yield data
+    finally:
+        if encoder is not None and encoder.process.poll() is None:
+            encoder.process.kill()
+            encoder.process.wait()
 
 
 def save_audio_as(
@@ -81,7 +283,7 @@ def save_audio_as(
         samples: Audio samples as numpy array
         sample_rate: Sample rate of the audio
         filename: Output filename (extension will be replaced if needed)
-        output_format: Target format (mp3, m4a, flac, ogg, wav)
+        output_format: Target format (mp3, m4a, flac, ogg, opus, webm, wav)
         bitrate: Bitrate for lossy formats
     """
     # Ensure filename has correct extension
@@ -105,7 +307,9 @@ SUPPORTED_FORMATS = {
     "m4a": {"name": "M4A/AAC", "extension": "m4a", "lossy": True},
     "flac": {"name": "FLAC", "extension": "flac", "lossy": False},
     "ogg": {"name": "OGG Vorbis", "extension": "ogg", "lossy": True},
+    "opus": {"name": "Opus", "extension": "opus", "lossy": True},
+    "webm": {"name": "WebM Opus", "extension": "webm", "lossy": True},
 }
 
-# Bitrate options for lossy formats
-BITRATE_OPTIONS = ["96k", "128k", "192k", "256k", "320k"]
\ No newline at end of file
+# Bitrate options for lossy formats, the lowest ones are meant for Opus
+BITRATE_OPTIONS = ["24k", "32k", "64k", "96k", "128k", "192k", "256k", "320k"]
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+Joining of audio chunks into a single signal
+"""
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+def join_chunks(
+    chunks: list[NDArray[np.float32]], crossfade: int = 0, silence: int = 0
+) -> NDArray[np.float32]:
+    """
+    Write chunks back to back into one preallocated buffer, in a single pass.
+
+    crossfade: number of samples each chunk overlaps the previous one, blended with
+        linear fades (shortened when a chunk is shorter than that).
+    silence: number of zero samples inserted between chunks instead.
+
+    The list is emptied as chunks are written, so the model outputs they point into
+    are released one at a time rather than all after a final concatenation.
+    """
+    assert not (crossfade and silence), "Use either crossfade or silence, not both"
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+
+    # Exact output length, overlaps shrink it and silences grow it
+    lengths = [len(chunk) for chunk in chunks]
+    overlaps = [min(crossfade, a, b) for a, b in zip(lengths, lengths[1:])]
+    total = sum(lengths) - sum(overlaps) + silence * (len(chunks) - 1)
+    out = np.empty(total, dtype=np.float32)
+
+    chunks.reverse()
+    pos = 0
+    for i in range(len(lengths)):
+        chunk = chunks.pop()
+        overlap = overlaps[i - 1] if i > 0 else 0
+        if overlap:
+            fade_in = np.linspace(0.0, 1.0, overlap + 2, dtype=np.float32)[1:-1]
+            tail = out[pos - overlap : pos]
+            tail *= fade_in[::-1]
+            tail += chunk[:overlap] * fade_in
+        out[pos : pos + len(chunk) - overlap] = chunk[overlap:]
+        pos += len(chunk) - overlap
+        if silence and i < len(lengths) - 1:
+            out[pos : pos + silence] = 0.0
+            pos += silence
+    return out
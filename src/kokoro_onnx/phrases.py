@@ -0,0 +1,131 @@
+"""
+Pre-rendered phrase banks, for serving a fixed set of prompts without running the model
+"""
+
+import json
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import SAMPLE_RATE
+from .log import log
+
+if TYPE_CHECKING:
+    from . import Kokoro
+
+
+@dataclass
+class Phrase:
+    id: str
+    text: str
+    voice: str
+    speed: float = 1.0
+    lang: str = "en-us"
+
+
+class PhraseBank(Mapping[str, NDArray[np.float32]]):
+    """
+    Clips stored back to back as float32 samples in a single blob file, with a .json
+    index next to it mapping each phrase id to its (offset, length) in samples.
+    The blob is memory mapped, so clips are zero-copy slices that can be written to a
+    socket directly (they support the buffer protocol), and server processes share
+    the same pages through the OS page cache.
+    """
+
+    def __init__(self, path: str):
+        with open(Path(path).with_suffix(".json"), encoding="utf-8") as fp:
+            index = json.load(fp)
+        self.sample_rate: int = index["sample_rate"]
+        self.index: dict[str, tuple[int, int]] = index["phrases"]
+        # Empty files can't be memory mapped
+        self.samples: NDArray[np.float32] = (
+            np.memmap(path, dtype=np.float32, mode="r")
+            if os.path.getsize(path)
+            else np.empty(0, dtype=np.float32)
+        )
+
+    def __getitem__(self, id: str) -> NDArray[np.float32]:
+        offset, length = self.index[id]
+        return self.samples[offset : offset + length]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+def build_phrase_bank(
+    kokoro: "Kokoro",
+    phrases: Iterable[Phrase],
+    path: str,
+    max_workers: int | None = None,
+) -> int:
+    """
+    Synthesize phrases with max_workers concurrent create() calls (kokoro.max_workers
+    by default) and write them in the layout read by PhraseBank.
+    Clips are written in input order as they complete, with at most a few of them
+    held in memory. The bank is built under temporary names and moved in place at the
+    end, so readers of a previous bank at path keep working meanwhile.
+    Returns the number of phrases written.
+    """
+    max_workers = max_workers or kokoro.max_workers
+    path = Path(path)
+    index_path = path.with_suffix(".json")
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_index_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+
+    index: dict[str, tuple[int, int]] = {}
+    ids: set[str] = set()
+    offset = 0
+    pending: deque[tuple[Phrase, Future]] = deque()
+
+    def write_next(fp):
+        nonlocal offset
+        phrase, future = pending.popleft()
+        samples, _ = future.result()
+        samples.astype(np.float32, copy=False).tofile(fp)
+        index[phrase.id] = (offset, len(samples))
+        offset += len(samples)
+        if len(index) % 100 == 0:
+            log.debug(f"Wrote {len(index)} phrases")
+
+    try:
+        with (
+            ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="kokoro-phrases"
+            ) as executor,
+            open(tmp_path, "wb") as fp,
+        ):
+            for phrase in phrases:
+                assert phrase.id not in ids, f"Duplicate phrase id {phrase.id}"
+                ids.add(phrase.id)
+                future = executor.submit(
+                    kokoro.create,
+                    phrase.text,
+                    voice=phrase.voice,
+                    speed=phrase.speed,
+                    lang=phrase.lang,
+                )
+                pending.append((phrase, future))
+                # Keep every worker busy without rendering far ahead of the writer
+                if len(pending) > max_workers * 2:
+                    write_next(fp)
+            while pending:
+                write_next(fp)
+
+        with open(tmp_index_path, "w", encoding="utf-8") as fp:
+            json.dump({"sample_rate": SAMPLE_RATE, "phrases": index}, fp)
+        os.replace(tmp_path, path)
+        os.replace(tmp_index_path, index_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+        tmp_index_path.unlink(missing_ok=True)
+    return len(index)
@@ -0,0 +1,217 @@
+"""
+onnxruntime session options and threading setup
+"""
+
+import dataclasses
+import os
+import platform
+from pathlib import Path
+
+import onnxruntime as rt
+
+from .cache import content_hash, file_fingerprint
+from .config import SessionConfig
+from .log import log
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": rt.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": rt.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": rt.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": rt.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    "sequential": rt.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": rt.ExecutionMode.ORT_PARALLEL,
+}
+
+SESSION_PRESETS = {
+    # One stream at a time: a single run uses every core and idle threads keep
+    # spinning so they pick up the next operator without waking up
+    "low-latency": SessionConfig(
+        graph_optimization_level="all",
+        execution_mode="sequential",
+        inter_op_num_threads=1,
+        allow_spinning=True,
+        max_workers=1,
+    ),
+    # Many concurrent streams: several small runs side by side, without
+    # spinning threads stealing CPU from the other runs
+    "max-throughput": SessionConfig(
+        graph_optimization_level="all",
+        execution_mode="sequential",
+        intra_op_num_threads=2,
+        inter_op_num_threads=1,
+        allow_spinning=False,
+    ),
+}
+
+
+def resolve_thread_counts(
+    max_workers: int | None = None,
+    intra_op_num_threads: int | None = None,
+) -> tuple[int, int | None]:
+    """
+    Size the inference executor and onnxruntime intra-op threads together,
+    so that concurrent runs (max_workers * intra_op_num_threads) fit the CPU count.
+
+    Returns (max_workers, intra_op_num_threads), where None keeps the onnxruntime default.
+    """
+    cpu_count = os.cpu_count() or 1
+    if max_workers is None:
+        if intra_op_num_threads:
+            max_workers = max(1, cpu_count // intra_op_num_threads)
+        else:
+            # A single run already uses all cores with the onnxruntime defaults
+            max_workers = 1
+    if intra_op_num_threads is None and max_workers > 1:
+        intra_op_num_threads = max(1, cpu_count // max_workers)
+    return max_workers, intra_op_num_threads
+
+
+def resolve_session_config(
+    session_config: SessionConfig | str | None = None, **overrides
+) -> SessionConfig:
+    """
+    Turn a preset name or SessionConfig into a complete SessionConfig,
+    applying the overrides that are not None and coordinating thread counts.
+    """
+    if isinstance(session_config, str):
+        if session_config not in SESSION_PRESETS:
+            raise ValueError(
+                f"Unknown session preset {session_config}, expected one of {list(SESSION_PRESETS)}"
+            )
+        session_config = SESSION_PRESETS[session_config]
+    session_config = session_config or SessionConfig()
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    session_config = dataclasses.replace(session_config, **overrides)
+
+    max_workers, intra_op_num_threads = resolve_thread_counts(
+        session_config.max_workers, session_config.intra_op_num_threads
+    )
+    return dataclasses.replace(
+        session_config,
+        max_workers=max_workers,
+        intra_op_num_threads=intra_op_num_threads,
+    )
+
+
+def create_session_options(session_config: SessionConfig) -> rt.SessionOptions:
+    sess_options = rt.SessionOptions()
+    if session_config.graph_optimization_level is not None:
+        sess_options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[
+            session_config.graph_optimization_level
+        ]
+    if session_config.intra_op_num_threads is not None:
+        sess_options.intra_op_num_threads = session_config.intra_op_num_threads
+    if session_config.inter_op_num_threads is not None:
+        sess_options.inter_op_num_threads = session_config.inter_op_num_threads
+    if session_config.execution_mode is not None:
+        sess_options.execution_mode = EXECUTION_MODES[session_config.execution_mode]
+    if session_config.enable_cpu_mem_arena is not None:
+        sess_options.enable_cpu_mem_arena = session_config.enable_cpu_mem_arena
+    if session_config.enable_mem_pattern is not None:
+        sess_options.enable_mem_pattern = session_config.enable_mem_pattern
+    if session_config.allow_spinning is not None:
+        allow_spinning = "1" if session_config.allow_spinning else "0"
+        sess_options.add_session_config_entry(
+            "session.intra_op.allow_spinning", allow_spinning
+        )
+        sess_options.add_session_config_entry(
+            "session.inter_op.allow_spinning", allow_spinning
+        )
+    return sess_options
+
+
+def optimized_model_path(
+    model_path: str, providers: list[str], session_config: SessionConfig
+) -> Path:
+    """
+    Path of the cached optimized graph next to model_path, keyed by everything
+    that affects the optimized result: the model file, onnxruntime version,
+    platform, providers, optimization level and format.
+    Thread counts and memory settings only affect how the graph runs, so machines
+    and pools of different sizes share the same file.
+    The saved graph is optimized at most at the "extended" level, which doesn't
+    depend on the CPU features beyond the architecture.
+    """
+    digest = content_hash(
+        [
+            *file_fingerprint(model_path),
+            rt.__version__,
+            platform.machine(),
+            providers,
+            session_config.graph_optimization_level,
+            session_config.optimized_model_format,
+        ]
+    )[:16]
+    model_path = Path(model_path)
+    return model_path.with_name(
+        f"{model_path.stem}.{digest}.{session_config.optimized_model_format}"
+    )
+
+
+def create_session(
+    model_path: str, providers: list[str], session_config: SessionConfig
+) -> rt.InferenceSession:
+    sess_options = create_session_options(session_config)
+    if not session_config.cache_optimized_model:
+        return rt.InferenceSession(
+            model_path, sess_options=sess_options, providers=providers
+        )
+
+    if session_config.optimized_model_format not in ("onnx", "ort"):
+        raise ValueError(
+            f"Unknown optimized model format {session_config.optimized_model_format}, expected onnx or ort"
+        )
+    # The "all" level adds layout transforms specific to the CPU they ran on (e.g.
+    # AVX2 vs AVX-512), so the saved graph stops at "extended" and those run at load
+    level = session_config.graph_optimization_level or "all"
+    saved_level = "extended" if level == "all" else level
+
+    cache_path = optimized_model_path(model_path, providers, session_config)
+    if not cache_path.exists() and not _save_optimized_model(
+        model_path, cache_path, providers, session_config, saved_level
+    ):
+        # E.g. a read-only model directory, run without the cache
+        return rt.InferenceSession(
+            model_path, sess_options=sess_options, providers=providers
+        )
+
+    log.debug(f"Loading optimized model from {cache_path}")
+    # Only the transforms left out of the saved graph still have to run
+    online_level = "all" if level == "all" else "disable"
+    sess_options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[online_level]
+    return rt.InferenceSession(
+        str(cache_path), sess_options=sess_options, providers=providers
+    )
+
+
+def _save_optimized_model(
+    model_path: str,
+    cache_path: Path,
+    providers: list[str],
+    session_config: SessionConfig,
+    level: str,
+) -> bool:
+    """
+    Optimize model_path at level and save the graph to cache_path.
+    Returns whether it was saved.
+    """
+    # Write to a temporary file first so other processes never load a partial model
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    sess_options = create_session_options(session_config)
+    sess_options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[level]
+    sess_options.optimized_model_filepath = str(tmp_path)
+    if session_config.optimized_model_format == "ort":
+        sess_options.add_session_config_entry("session.save_model_format", "ORT")
+    try:
+        rt.InferenceSession(model_path, sess_options=sess_options, providers=providers)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        log.warning(f"Failed to save optimized model to {cache_path}: {e}")
+        return False
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    log.debug(f"Saved optimized model to {cache_path}")
+    return True
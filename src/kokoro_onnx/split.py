@@ -0,0 +1,169 @@
+"""
+Split text into sentences ahead of phonemization,
+and phonemes into chunks that fit the model context
+"""
+
+import math
+import re
+from collections.abc import Callable, Iterator
+
+# Boundaries to split at, from the most to the least preferred
+BOUNDARIES = [
+    re.compile(r"(?<=[.!?])\s+"),  # sentences
+    re.compile(r"(?<=[,;:—…])\s+"),  # clauses
+    re.compile(r"\s+"),  # words
+]
+
+
+def _split_units(
+    phonemes: str,
+    count_tokens: Callable[[str], int],
+    max_tokens: int,
+    boundaries: list[re.Pattern],
+) -> list[str]:
+    """
+    Break phonemes into units of at most max_tokens, falling back to finer
+    boundaries only for the parts that are still too long.
+    """
+    if count_tokens(phonemes) <= max_tokens:
+        return [phonemes]
+    if not boundaries:
+        # A single word longer than the context, split it by characters
+        return [
+            phonemes[i : i + max_tokens] for i in range(0, len(phonemes), max_tokens)
+        ]
+    units = []
+    for part in boundaries[0].split(phonemes):
+        if part:
+            units += _split_units(part, count_tokens, max_tokens, boundaries[1:])
+    return units
+
+
+def _pack_units(
+    units: list[str],
+    count_tokens: Callable[[str], int],
+    max_tokens: int,
+    separator: str,
+) -> list[str]:
+    """
+    Join consecutive units into chunks of at most max_tokens,
+    aiming for chunks of similar size.
+    """
+    units = [unit.strip() for unit in units if unit.strip()]
+    if not units:
+        return []
+    counts = [count_tokens(unit) for unit in units]
+    sep_count = count_tokens(separator)
+    remaining = sum(counts) + sep_count * (len(units) - 1)
+
+    def balanced_target() -> float:
+        # Even share of what is left over the fewest chunks that can hold it
+        return remaining / math.ceil(remaining / max_tokens)
+
+    target = balanced_target()
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for unit, count in zip(units, counts):
+        new_size = size + sep_count + count if current else count
+        # Start a new chunk when the unit doesn't fit, or when leaving it out
+        # gets the current chunk closer to the target size
+        if current and (new_size > max_tokens or new_size - target > target - size):
+            chunks.append(separator.join(current))
+            # Rebalance the rest, as earlier chunks may have come out smaller
+            remaining -= size + sep_count
+            target = balanced_target()
+            current, size = [unit], count
+        else:
+            current.append(unit)
+            size = new_size
+    chunks.append(separator.join(current))
+    return chunks
+
+
+def split_phonemes(
+    phonemes: str, count_tokens: Callable[[str], int], max_tokens: int
+) -> list[str]:
+    """
+    Split phonemes into chunks of at most max_tokens tokens without truncating.
+    Prefer sentence, then clause, then word boundaries, and aim for chunks of
+    similar size so no single chunk dominates parallel inference.
+    """
+    units = _split_units(phonemes.strip(), count_tokens, max_tokens, BOUNDARIES)
+    return _pack_units(units, count_tokens, max_tokens, " ")
+
+
+# Words ending with a period that usually don't end a sentence, per language prefix
+ABBREVIATIONS = {
+    "en": set(
+        "mr mrs ms dr prof sr jr st mt vs etc e.g i.e inc ltd co corp no fig approx "
+        "dept jan feb mar apr jun jul aug sep sept oct nov dec".split()
+    ),
+    "fr": set("m mm mme mlle dr pr st ste etc cf env p.ex".split()),
+    "es": set("sr sra srta dr dra ud uds etc pág núm p.ej".split()),
+    "it": set("sig sig.ra sigg dott dott.ssa prof ing avv ecc pag".split()),
+    "pt": set("sr sra srta dr dra prof etc pág núm ex".split()),
+}
+
+# Sentence ending punctuation followed by whitespace, or CJK / Devanagari full stops
+SENTENCE_END = re.compile(r"[.!?…]+[\"'”’)\]]*\s+|[。！？]+[”’」』）]*\s*|[।॥]\s*")
+
+
+def _is_abbreviation(sentence: str, abbreviations: set[str]) -> bool:
+    """Whether the period ending sentence belongs to an abbreviation or an initial."""
+    words = sentence.rstrip().split()
+    if not words or not words[-1].endswith("."):
+        return False
+    word = words[-1].rstrip(".").lstrip("\"'“‘(")
+    # Single letter initials such as "J. R. R. Tolkien"
+    if len(word) == 1 and word.isalpha() and word.isupper():
+        return True
+    return word.lower() in abbreviations
+
+
+def _split_sentences(line: str, abbreviations: set[str]) -> Iterator[str]:
+    start = 0
+    for match in SENTENCE_END.finditer(line):
+        sentence = line[start : match.end()]
+        # "... and so on" continues the sentence
+        if line[match.end() : match.end() + 1].islower():
+            continue
+        # A period inside numbers ("3.14") isn't followed by whitespace, so it never matches
+        if match.group().lstrip().startswith(".") and _is_abbreviation(
+            sentence, abbreviations
+        ):
+            continue
+        yield sentence.strip()
+        start = match.end()
+    if line[start:].strip():
+        yield line[start:].strip()
+
+
+def _split_lines(text: str) -> list[str]:
+    """
+    Lines of text, where a line starting with a lowercase letter continues the
+    previous one (hard wrapped text) unless a paragraph break separates them.
+    """
+    lines: list[str] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if lines and lines[-1] and line[:1].islower():
+            lines[-1] += " " + line
+        else:
+            lines.append(line)
+    return lines
+
+
+def split_text(text: str, lang: str = "en-us", max_chars: int = 500) -> Iterator[str]:
+    """
+    Split text into sentences that can be phonemized independently, lazily so
+    downstream stages can start on the first sentence. Paragraph breaks and
+    newlines end a segment, except inside hard wrapped sentences, abbreviations and
+    numbers don't, and segments longer than max_chars are split further at clause
+    then word boundaries.
+    """
+    abbreviations = ABBREVIATIONS.get(lang.split("-")[0].lower(), set())
+    for line in _split_lines(text):
+        for sentence in _split_sentences(line, abbreviations):
+            units = _split_units(sentence, len, max_chars, BOUNDARIES[1:])
+            yield from _pack_units(units, len, max_chars, " ")
@@ -1,19 +1,63 @@
 import ctypes
+import hashlib
+import json
+import multiprocessing
 import os
 import platform
 import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
 
 import espeakng_loader
-import phonemizer
+import numpy as np
+from numpy.typing import NDArray
+from phonemizer.backend import EspeakBackend
 from phonemizer.backend.espeak.wrapper import EspeakWrapper
+from phonemizer.separator import default_separator
+from phonemizer.utils import list2str, str2list
 
+from .cache import PhonemeCache
 from .config import DEFAULT_VOCAB, MAX_PHONEME_LENGTH, EspeakConfig
 from .log import log
 
 
+class _VocabFilter(dict):
+    """str.translate table keeping vocab characters and deleting everything else"""
+
+    def __missing__(self, key):
+        return None
+
+
 class Tokenizer:
-    def __init__(self, espeak_config: EspeakConfig | None = None, vocab: dict = None):
+    def __init__(
+        self,
+        espeak_config: EspeakConfig | None = None,
+        vocab: dict = None,
+        phoneme_cache: PhonemeCache | None = None,
+        phonemize_workers: int = 0,
+    ):
+        """
+        phonemize_workers: number of worker processes, each with its own espeak instance,
+            used by phonemize_batch() and submit(). 0 phonemizes in the calling thread.
+        """
         self.vocab = vocab or DEFAULT_VOCAB
+        self.phoneme_cache = phoneme_cache
+        self.phonemize_workers = phonemize_workers
+        self._pool: ProcessPoolExecutor | None = None
+        # Phonemes are filtered by the vocab, so cached entries are only valid for the same vocab
+        self.vocab_hash = hashlib.sha256(
+            json.dumps(self.vocab, sort_keys=True).encode()
+        ).hexdigest()[:16]
+        # Codepoint -> token id lookup table, -1 for characters outside the vocab.
+        # The last entry catches every codepoint above the largest vocab one.
+        chars = {ord(p): i for p, i in self.vocab.items() if len(p) == 1}
+        self._lookup = np.full(max(chars) + 2, -1, dtype=np.int64)
+        self._lookup[list(chars)] = list(chars.values())
+        self._filter = _VocabFilter({c: c for c in chars})
+        # One long lived espeak backend per language, created on first use.
+        # A backend isn't thread safe, so each one is guarded by its own lock.
+        self._backends: dict[str, tuple[EspeakBackend, threading.Lock]] = {}
+        self._backends_lock = threading.Lock()
 
         if not espeak_config:
             espeak_config = EspeakConfig()
@@ -52,17 +96,38 @@ class Tokenizer:
 
         EspeakWrapper.set_data_path(espeak_config.data_path)
         EspeakWrapper.set_library(espeak_config.lib_path)
+        self.espeak_config = espeak_config
+
+    def _get_backend(self, lang: str) -> tuple[EspeakBackend, threading.Lock]:
+        with self._backends_lock:
+            if lang not in self._backends:
+                log.debug(f"Creating espeak backend for {lang}")
+                backend = EspeakBackend(
+                    lang, preserve_punctuation=True, with_stress=True
+                )
+                self._backends[lang] = (backend, threading.Lock())
+            return self._backends[lang]
 
     @staticmethod
     def normalize_text(text) -> str:
         return text.strip()
 
-    def tokenize(self, phonemes):
+    def filter_phonemes(self, phonemes: str) -> str:
+        """Drop the characters outside the vocab, which tokenize() would skip"""
+        return phonemes.translate(self._filter)
+
+    def count_tokens(self, phonemes: str) -> int:
+        """Number of tokens tokenize() produces for phonemes, without the length check"""
+        return len(self.filter_phonemes(phonemes))
+
+    def tokenize(self, phonemes: str) -> NDArray[np.int64]:
         if len(phonemes) > MAX_PHONEME_LENGTH:
             raise ValueError(
                 f"text is too long, must be less than {MAX_PHONEME_LENGTH} phonemes"
             )
-        return [i for i in map(self.vocab.get, phonemes) if i is not None]
+        codepoints = np.frombuffer(phonemes.encode("utf-32-le"), dtype=np.uint32)
+        tokens = self._lookup[np.minimum(codepoints, len(self._lookup) - 1)]
+        return tokens[tokens >= 0]
 
     def phonemize(self, text, lang="en-us", norm=True) -> str:
         """
@@ -71,8 +136,91 @@ class Tokenizer:
         if norm:
             text = Tokenizer.normalize_text(text)
 
-        phonemes = phonemizer.phonemize(
-            text, lang, preserve_punctuation=True, with_stress=True
-        )
-        phonemes = "".join(filter(lambda p: p in self.vocab, phonemes))
-        return phonemes.strip()
+        if self.phoneme_cache is not None:
+            phonemes = self.phoneme_cache.get(text, lang, self.vocab_hash)
+            if phonemes is not None:
+                return phonemes
+
+        backend, lock = self._get_backend(lang)
+        # Same as phonemizer.phonemize(), without its per call setup
+        lines = [line.strip(os.linesep) for line in str2list(text)]
+        lines = [line for line in lines if line.strip()]
+        phonemized = []
+        if lines:
+            with lock:
+                phonemized = backend.phonemize(
+                    lines, separator=default_separator, strip=False
+                )
+        phonemes = list2str(phonemized)
+        phonemes = self.filter_phonemes(phonemes).strip()
+        if self.phoneme_cache is not None:
+            self.phoneme_cache.set(text, lang, self.vocab_hash, phonemes)
+        return phonemes
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._backends_lock:
+            if self._pool is None:
+                log.debug(
+                    f"Starting {self.phonemize_workers} phonemization worker processes"
+                )
+                # Spawn rather than fork, the parent usually runs onnxruntime threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.phonemize_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.espeak_config, self.vocab),
+                )
+            return self._pool
+
+    def submit(self, text: str, lang="en-us") -> Future[str]:
+        """
+        Phonemize text in a worker process, returning a future of the phonemes.
+        Requires phonemize_workers > 0.
+        """
+        assert self.phonemize_workers > 0, "submit requires phonemize_workers > 0"
+        text = Tokenizer.normalize_text(text)
+        if self.phoneme_cache is not None:
+            phonemes = self.phoneme_cache.get(text, lang, self.vocab_hash)
+            if phonemes is not None:
+                future: Future[str] = Future()
+                future.set_result(phonemes)
+                return future
+
+        future = self._get_pool().submit(_phonemize_in_worker, text, lang)
+        if self.phoneme_cache is not None:
+
+            def cache_result(future: Future[str]):
+                if not future.cancelled() and future.exception() is None:
+                    self.phoneme_cache.set(text, lang, self.vocab_hash, future.result())
+
+            future.add_done_callback(cache_result)
+        return future
+
+    def phonemize_batch(self, texts: list[str], lang="en-us") -> list[str]:
+        """
+        Phonemize several texts (e.g. the sentences of a document), in parallel
+        worker processes when phonemize_workers > 0. Results keep the order of texts.
+        """
+        if self.phonemize_workers <= 0:
+            return [self.phonemize(text, lang) for text in texts]
+        futures = [self.submit(text, lang) for text in texts]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Shut down the phonemization worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Tokenizer of a phonemization worker process, see Tokenizer.phonemize_workers
+_worker_tokenizer: Tokenizer | None = None
+
+
+def _init_worker(espeak_config: EspeakConfig, vocab: dict):
+    global _worker_tokenizer
+    _worker_tokenizer = Tokenizer(espeak_config, vocab=vocab)
+
+
+def _phonemize_in_worker(text: str, lang: str) -> str:
+    return _worker_tokenizer.phonemize(text, lang)
@@ -13,6 +13,7 @@ Reference:
     - https://github.com/librosa/librosa/blob/894942673d55aa2206df1296b6c4c50827c7f1d6/librosa/effects.py#L612
 """
 
+import math
 import warnings
 from collections.abc import Callable
 from typing import Any
@@ -295,6 +296,56 @@ def trim(
     return y[..., start:end], np.asarray([start, end])
 
 
+def trim_mono(
+    y: np.ndarray,
+    *,
+    top_db: float = 60,
+    frame_length: int = 2048,
+    hop_length: int = 512,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Specialized `trim` for mono signals with the default ``ref=np.max``.
+
+    Gives the same result as ``trim(y, top_db=top_db, frame_length=frame_length,
+    hop_length=hop_length)`` in a single pass over the samples, without padding,
+    framing or converting to decibels. The signal is cut into blocks that every frame
+    boundary falls on, and frame energies are differences of the cumulative sum of
+    the block energies.
+    """
+    n = y.shape[-1]
+    half = frame_length // 2
+    block = math.gcd(hop_length, frame_length, half)
+    n_full = n // block
+    full = y[: n_full * block].reshape(n_full, block)
+    tail = y[n_full * block :]
+    energy = np.zeros(n_full + 2 if tail.size else n_full + 1)
+    energy[1 : n_full + 1] = np.einsum("ij,ij->i", full, full)
+    if tail.size:
+        energy[-1] = np.dot(tail, tail)
+    np.cumsum(energy, out=energy)
+
+    # Centered frames, the zero padding of `rms` contributes no energy
+    n_frames = 1 + (n + 2 * half - frame_length) // hop_length
+    starts = np.arange(n_frames) * hop_length - half
+    ends = starts + frame_length
+    n_blocks = len(energy) - 1
+    starts = np.where(starts >= n, n_blocks, np.maximum(starts, 0) // block)
+    ends = np.where(ends >= n, n_blocks, np.maximum(ends, 0) // block)
+    power = (energy[ends] - energy[starts]) / frame_length
+
+    # db > -top_db, where db is relative to the loudest frame and both are floored by amin
+    amin = 1e-10
+    threshold = max(amin, power.max(initial=0.0)) * 10.0 ** (-top_db / 10.0)
+    non_silent = np.maximum(power, amin) > threshold
+
+    if not non_silent.any():
+        return y[..., 0:0], np.asarray([0, 0])
+    first = int(np.argmax(non_silent))
+    last = n_frames - 1 - int(np.argmax(non_silent[::-1]))
+    start = first * hop_length
+    end = min(n, (last + 1) * hop_length)
+    return y[..., start:end], np.asarray([start, end])
+
+
 def rms(
     *,
     y: np.ndarray | None = None,
@@ -0,0 +1,127 @@
+"""
+Voice styles storage
+"""
+
+import json
+import threading
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .cache import BytesLRU
+from .log import log
+
+
+class MmapVoices(Mapping[str, NDArray[np.float32]]):
+    """
+    Voices stored uncompressed as a single [n_voices, 510, 1, 256] float32 .npy file,
+    with the voice names in a .json index next to it.
+    The file is memory mapped, so lookups are zero-copy slices and worker processes
+    share the same pages through the OS page cache.
+    """
+
+    def __init__(self, path: str):
+        self.styles: np.memmap = np.load(path, mmap_mode="r")
+        with open(Path(path).with_suffix(".json"), encoding="utf-8") as fp:
+            names: list[str] = json.load(fp)
+        self.index = {name: i for i, name in enumerate(names)}
+
+    def __getitem__(self, name: str) -> NDArray[np.float32]:
+        return self.styles[self.index[name]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+class VoiceCache(Mapping[str, NDArray[np.float32]]):
+    """
+    Bounded LRU cache of decoded voice styles in front of a voices store.
+    Reading a voice from the npz archive decompresses it on every access,
+    the cache keeps the most recently used ones decoded within max_bytes.
+    Cached styles are shared between callers, so they are read-only. MmapVoices
+    stores are not cached, their lookups are already zero-copy.
+    """
+
+    def __init__(self, voices: Mapping[str, NDArray[np.float32]], max_bytes: int):
+        self.voices = voices
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._cache = BytesLRU(max_bytes)
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> NDArray[np.float32]:
+        if isinstance(self.voices, MmapVoices):
+            return self.voices[name]
+        with self._lock:
+            style = self._cache.get(name)
+            if style is not None:
+                self.hits += 1
+                return style
+            self.misses += 1
+
+        style = self.voices[name]
+        with self._lock:
+            self._put(name, style)
+        return style
+
+    def _put(self, name: str, style: NDArray[np.float32]):
+        style.flags.writeable = False
+        self._cache.put(name, style)
+
+    @property
+    def nbytes(self) -> int:
+        return self._cache.nbytes
+
+    def preload(self, names: Iterable[str]):
+        """Decode voices ahead of time, e.g. the hot voices of a server."""
+        if isinstance(self.voices, MmapVoices):
+            return
+        for name in names:
+            style = self.voices[name]
+            with self._lock:
+                self._put(name, style)
+        if self.nbytes >= self.max_bytes:
+            log.warning(
+                f"Voice cache is full ({self.nbytes} bytes), some preloaded voices may be evicted"
+            )
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.voices
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.voices)
+
+    def __len__(self) -> int:
+        return len(self.voices)
+
+
+def save_mmap_voices(voices: Mapping[str, NDArray[np.float32]], path: str):
+    """
+    Write voices (e.g. the NpzFile of voices-v1.0.bin) in the layout read by MmapVoices
+    """
+    names = sorted(voices.keys())
+    shape = voices[names[0]].shape
+    styles = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.float32, shape=(len(names), *shape)
+    )
+    for i, name in enumerate(names):
+        styles[i] = voices[name]
+    styles.flush()
+    with open(Path(path).with_suffix(".json"), "w", encoding="utf-8") as fp:
+        json.dump(names, fp)
+
+
+def load_voices(voices_path: str) -> Mapping[str, NDArray[np.float32]]:
+    """
+    Load voices from a .npy file written by save_mmap_voices,
+    or from the npz archive (voices-v1.0.bin) otherwise.
+    """
+    if Path(voices_path).suffix == ".npy":
+        return MmapVoices(voices_path)
+    return np.load(voices_path)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from kokoro_onnx.join import join_chunks
+
+
+def _chunks(*lengths):
+    return [np.full(n, i + 1, dtype=np.float32) for i, n in enumerate(lengths)]
+
+
+def test_join_chunks_concatenates():
+    chunks = _chunks(3, 2, 4)
+    expected = np.concatenate(chunks)
+    assert np.array_equal(join_chunks(chunks), expected)
+    # Chunks are released as they are written
+    assert chunks == []
+
+
+def test_join_chunks_empty():
+    assert len(join_chunks([])) == 0
+
+
+def test_join_chunks_silence():
+    out = join_chunks(_chunks(2, 3), silence=4)
+    assert np.array_equal(out, [1, 1, 0, 0, 0, 0, 2, 2, 2])
+
+
+def test_join_chunks_crossfade():
+    out = join_chunks(_chunks(10, 10), crossfade=4)
+    assert len(out) == 16
+    assert np.array_equal(out[:6], np.ones(6))
+    assert np.array_equal(out[10:], np.full(6, 2))
+    # Linear blend from the first chunk into the second
+    assert np.all(np.diff(out[6:10]) > 0)
+    assert np.all((out[6:10] > 1) & (out[6:10] < 2))
+
+
+def test_join_chunks_crossfade_longer_than_chunk():
+    out = join_chunks(_chunks(5, 2, 5), crossfade=100)
+    # Each overlap is shortened to the shorter chunk of the pair
+    assert len(out) == 5 + 2 + 5 - 2 - 2
+    assert np.all((out >= 1) & (out <= 3))
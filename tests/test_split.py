@@ -0,0 +1,44 @@
+from kokoro_onnx.split import split_phonemes, split_text
+
+
+def test_split_phonemes_balances_chunks():
+    phonemes = "həlˈoʊ wˈɜːld, " * 100
+    chunks = split_phonemes(phonemes, len, 509)
+    assert len(chunks) == 3
+    assert all(len(chunk) <= 509 for chunk in chunks)
+    assert max(map(len, chunks)) - min(map(len, chunks)) <= 15
+    assert " ".join(chunks) == phonemes.strip()
+
+
+def test_split_phonemes_short_input():
+    assert split_phonemes("həlˈoʊ wˈɜːld", len, 509) == ["həlˈoʊ wˈɜːld"]
+    assert split_phonemes("  ", len, 509) == []
+
+
+def test_split_text_sentences():
+    text = "Hello there. How are you? Fine!"
+    assert list(split_text(text)) == ["Hello there.", "How are you?", "Fine!"]
+
+
+def test_split_text_abbreviations_and_numbers():
+    text = "Dr. Smith paid 3.14 dollars, i.e. not much. J. R. R. Tolkien wrote it."
+    assert list(split_text(text)) == [
+        "Dr. Smith paid 3.14 dollars, i.e. not much.",
+        "J. R. R. Tolkien wrote it.",
+    ]
+
+
+def test_split_text_hard_wrapped_lines():
+    text = "This sentence is\nwrapped over lines.\n\nNew paragraph\nStarts here"
+    assert list(split_text(text)) == [
+        "This sentence is wrapped over lines.",
+        "New paragraph",
+        "Starts here",
+    ]
+
+
+def test_split_text_long_segment():
+    text = "word, " * 200
+    segments = list(split_text(text, max_chars=100))
+    assert all(len(segment) <= 100 for segment in segments)
+    assert " ".join(segments) == text.strip()
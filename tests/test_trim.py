@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from kokoro_onnx.trim import trim, trim_mono
+
+FRAME_HOP = [(2048, 512), (2048, 2048), (1024, 256), (1000, 300), (512, 384)]
+
+
+def _signals():
+    rng = np.random.default_rng(0)
+    speech = np.zeros(24000, dtype=np.float32)
+    speech[5000:19000] = rng.standard_normal(14000) * 0.3
+    start_burst = np.zeros(12000, dtype=np.float32)
+    start_burst[:50] = 1.0
+    end_burst = np.zeros(12000, dtype=np.float32)
+    end_burst[-50:] = 1.0
+    return {
+        "random": rng.standard_normal(20000).astype(np.float32),
+        "speech": speech,
+        "silent": np.zeros(10000, dtype=np.float32),
+        "short": rng.standard_normal(700).astype(np.float32),
+        "start_burst": start_burst,
+        "end_burst": end_burst,
+    }
+
+
+@pytest.mark.parametrize("frame_length, hop_length", FRAME_HOP)
+@pytest.mark.parametrize("name", list(_signals()))
+def test_trim_mono_matches_trim(name, frame_length, hop_length):
+    y = _signals()[name]
+    kwargs = {"frame_length": frame_length, "hop_length": hop_length}
+    trimmed, index = trim_mono(y, **kwargs)
+    expected, expected_index = trim(y, **kwargs)
+    assert list(index) == list(expected_index)
+    assert np.array_equal(trimmed, expected)